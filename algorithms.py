@@ -1,10 +1,13 @@
+import heapq
 import logging
-from typing import Dict, List, Optional, Tuple
-from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from numba import njit
 from tqdm import tqdm
 
-from configUtils import getBenefitShorterSentences, getNumFlashcardsPerWord
+from configUtils import getGeneratorConfig, getNumFlashcardsPerWord
 from models import Line, ClozeFlashcard, SimpleClozeFlashcard, Word
+from resources import GeneratorConfig
 from globalUtils import (
     getUniqueWordIdToWordObjects,
     getInUseClozeFlashcards,
@@ -13,6 +16,22 @@ from globalUtils import (
 
 logger = logging.getLogger(__name__)
 
+def hasEnoughClozeFlashcards(
+    uniqueWordId: str,
+    wordToSimpleClozeFlashcards: Dict[str, List[SimpleClozeFlashcard]],
+    numFlashcardsPerWord: int
+) -> bool:
+    """
+    Whether the word already has numFlashcardsPerWord or more cloze flashcards.
+    """
+    existingSimpleClozeFlashcards: Optional[List[SimpleClozeFlashcard]] = (
+        wordToSimpleClozeFlashcards.get(uniqueWordId)
+    )
+    return (
+        existingSimpleClozeFlashcards is not None
+        and len(existingSimpleClozeFlashcards) >= numFlashcardsPerWord
+    )
+
 def preAlgorithmChecks(
     uniqueWordId: str,
     wordToSimpleClozeFlashcards: Dict[str, List[SimpleClozeFlashcard]],
@@ -20,13 +39,6 @@ def preAlgorithmChecks(
     inUseClozeFlashcards: Dict[str, List[ClozeFlashcard]],
     unusedWords: List[Word]
 ) -> Tuple[Dict[str, List[SimpleClozeFlashcard]], bool]:
-    # If the word already has equal or more cloze flashcards than numFlashcardsPerWord, skip it
-    if (
-        uniqueWordId in wordToSimpleClozeFlashcards
-        and len(wordToSimpleClozeFlashcards[uniqueWordId]) >= numFlashcardsPerWord
-    ):
-        return wordToSimpleClozeFlashcards, True
-
     inUseClozeFlashcardsForWord: List[ClozeFlashcard] = (
         inUseClozeFlashcards.get(uniqueWordId, [])
     )
@@ -49,14 +61,7 @@ def preAlgorithmChecks(
                 word.line, word.index
             ).getSimpleClozeFlashcard()
 
-            if (currentUniqueWordId in inUseClozeFlashcards and
-                simpleClozeFlashcard in inUseClozeFlashcardsForWord):
-                # If the cloze flashcard is already in use, skip it
-                continue
-
-            if currentUniqueWordId not in wordToSimpleClozeFlashcards:
-                wordToSimpleClozeFlashcards[currentUniqueWordId] = []
-            wordToSimpleClozeFlashcards[currentUniqueWordId].append(
+            wordToSimpleClozeFlashcards.setdefault(currentUniqueWordId, []).append(
                 simpleClozeFlashcard
             )
 
@@ -79,17 +84,34 @@ def firstSentencesFirstAlgorithm(
     )
     numFlashcardsPerWord: int = getNumFlashcardsPerWord(configFilePath)
 
-    with tqdm(total=len(uniqueWordIdToWordObjects), desc="Processing unique words") as pbar:
+    with tqdm(
+        total=len(uniqueWordIdToWordObjects),
+        desc="Processing unique words",
+        # Most words take well under a millisecond so only redraw the bar
+        # every 200th of the way through or every quarter of a second
+        miniters=max(1, len(uniqueWordIdToWordObjects) // 200),
+        mininterval=0.25
+    ) as pbar:
         for uniqueWordId, words in uniqueWordIdToWordObjects.items():
-            # Create a list of the words that are not already in use
-            unusedWords: List[Word] = []
+            # Skip words that already have enough cloze flashcards before
+            # working out which of their instances are unused
+            if hasEnoughClozeFlashcards(
+                uniqueWordId, wordToSimpleClozeFlashcards, numFlashcardsPerWord
+            ):
+                pbar.update(1)
+                continue
 
             inUseClozeFlashcardsForWord: List[ClozeFlashcard] = (
                 inUseClozeFlashcards.get(uniqueWordId, [])
             )
-            for word in words:
-                if not word.thisInstanceInClozeFlashcards(inUseClozeFlashcardsForWord):
-                    unusedWords.append(word)
+            inUseInstances: Set[Tuple[int, int]] = ClozeFlashcard.getInstances(
+                inUseClozeFlashcardsForWord
+            )
+            # Create a list of the words that are not already in use
+            unusedWords: List[Word] = [
+                word for word in words
+                if not word.thisInstanceInClozeFlashcards(inUseInstances)
+            ]
 
             wordToSimpleClozeFlashcards, toContinue = (
                 preAlgorithmChecks(
@@ -107,6 +129,7 @@ def firstSentencesFirstAlgorithm(
             # Subtract the number of cloze flashcards already in use for the word from n
             newSentenceNum = numFlashcardsPerWord - len(inUseClozeFlashcardsForWord)
 
+            newSimpleClozeFlashcards: List[SimpleClozeFlashcard] = []
             for word in unusedWords[:newSentenceNum]:
                 if word.line is None or word.index is None:
                     logger.error(
@@ -119,10 +142,11 @@ def firstSentencesFirstAlgorithm(
                     word.line, word.index
                 ).getSimpleClozeFlashcard()
 
-                if uniqueWordId not in wordToSimpleClozeFlashcards:
-                    wordToSimpleClozeFlashcards[uniqueWordId] = []
-                wordToSimpleClozeFlashcards[uniqueWordId].append(
-                    simpleClozeFlashcard
+                newSimpleClozeFlashcards.append(simpleClozeFlashcard)
+
+            if newSimpleClozeFlashcards:
+                wordToSimpleClozeFlashcards.setdefault(uniqueWordId, []).extend(
+                    newSimpleClozeFlashcards
                 )
 
     return wordToSimpleClozeFlashcards
@@ -143,22 +167,34 @@ def mostDifferentAlgorithm(
     wordToSimpleClozeFlashcards: Dict[str, List[SimpleClozeFlashcard]] = (
         createInitialClozeFlashcards(inUseClozeFlashcards)
     )
-    numFlashcardsPerWord: int = getNumFlashcardsPerWord(configFilePath)
-
-    calculatedCosDissimilarities: Dict[Tuple[int, int], float] = {}
-    calculatedSentenceLengthScores: Dict[int, float] = {}
-
-    with tqdm(total=len(uniqueWordIdToWordObjects), desc="Processing unique words") as pbar:
+    generatorConfig: GeneratorConfig = getGeneratorConfig(configFilePath)
+    numFlashcardsPerWord: int = generatorConfig.numFlashcardsPerWord
+    benefitShorterSentences: bool = generatorConfig.benefitShorterSentences
+
+    with tqdm(
+        total=len(uniqueWordIdToWordObjects),
+        desc="Processing unique words",
+        miniters=max(1, len(uniqueWordIdToWordObjects) // 200),
+        mininterval=0.25
+    ) as pbar:
         for uniqueWordId, words in uniqueWordIdToWordObjects.items():
-            # Create a list of the words that are not already in use
-            unusedWords: List[Word] = []
+            if hasEnoughClozeFlashcards(
+                uniqueWordId, wordToSimpleClozeFlashcards, numFlashcardsPerWord
+            ):
+                pbar.update(1)
+                continue
 
             inUseClozeFlashcardsForWord: List[ClozeFlashcard] = (
                 inUseClozeFlashcards.get(uniqueWordId, [])
             )
-            for word in words:
-                if not word.thisInstanceInClozeFlashcards(inUseClozeFlashcardsForWord):
-                    unusedWords.append(word)
+            inUseInstances: Set[Tuple[int, int]] = ClozeFlashcard.getInstances(
+                inUseClozeFlashcardsForWord
+            )
+            # Create a list of the words that are not already in use
+            unusedWords: List[Word] = [
+                word for word in words
+                if not word.thisInstanceInClozeFlashcards(inUseInstances)
+            ]
 
             wordToSimpleClozeFlashcards, toContinue = (
                 preAlgorithmChecks(
@@ -179,33 +215,29 @@ def mostDifferentAlgorithm(
             }
 
             # Add the in-use cloze flashcards to the lineIdToWord
+            # and collect their line IDs in the same pass
+            inUseIds: List[int] = []
             for clozeFlashcard in inUseClozeFlashcardsForWord:
                 lineId: int = clozeFlashcard.line.id
                 clozeWord: Word = clozeFlashcard.getFirstClozeWord()
                 lineIdToWord[lineId] = clozeWord
-
-            inUseIds: List[int] = [
-                clozeFlashcard.line.id for clozeFlashcard in inUseClozeFlashcardsForWord
-            ]
+                inUseIds.append(lineId)
+            inUseIdSet: Set[int] = set(inUseIds)
 
             # Subtract the number of cloze flashcards already in use for the word from n
             newSentenceNum = numFlashcardsPerWord - len(inUseClozeFlashcardsForWord)
 
             lineIds: List[int] = list(lineIdToWord.keys())
             # Remove the in-use IDs from the line IDs
-            lineIds = [lineId for lineId in lineIds if lineId not in inUseIds]
+            lineIds = [lineId for lineId in lineIds if lineId not in inUseIdSet]
             # Combination means combination of sentences, not words
-            newCombinations: List[Tuple[int, ...]] = generateNewCombinations(
-                lineIds, inUseIds, newSentenceNum
-            )
-
             bestCombination: Optional[Tuple[int, ...]] = findMostDifferentCombination(
-                configFilePath,
-                newCombinations,
+                benefitShorterSentences,
+                lineIds,
+                inUseIds,
+                newSentenceNum,
                 lineIdToWord,
-                calculatedCosDissimilarities,
-                uniqueWordIdToWordObjects,
-                calculatedSentenceLengthScores
+                uniqueWordIdToWordObjects
             )
 
             if bestCombination is None:
@@ -214,9 +246,10 @@ def mostDifferentAlgorithm(
                 continue
 
             bestCombinationWithoutInUse: Tuple[int, ...] = removeInUseIds(
-                bestCombination, inUseIds
+                bestCombination, inUseIdSet
             )
 
+            newSimpleClozeFlashcards: List[SimpleClozeFlashcard] = []
             for lineId in bestCombinationWithoutInUse:
                 if lineId not in lineIdToWord:
                     logger.error(
@@ -238,91 +271,259 @@ def mostDifferentAlgorithm(
                 newSimpleClozeFlashcard: SimpleClozeFlashcard = ClozeFlashcard(
                     line, wordIndex
                 ).getSimpleClozeFlashcard()
-                if uniqueWordId not in wordToSimpleClozeFlashcards:
-                    wordToSimpleClozeFlashcards[uniqueWordId] = []
-                wordToSimpleClozeFlashcards[uniqueWordId].append(
-                    newSimpleClozeFlashcard
+                newSimpleClozeFlashcards.append(newSimpleClozeFlashcard)
+
+            if newSimpleClozeFlashcards:
+                wordToSimpleClozeFlashcards.setdefault(uniqueWordId, []).extend(
+                    newSimpleClozeFlashcards
                 )
             pbar.update(1)
 
     return wordToSimpleClozeFlashcards
 
-def generateNewCombinations(
-    lineIds: List[int],
-    inUseIds: List[int],
-    n: int
-) -> List[Tuple[int, ...]]:
+def buildDissimilarityMatrix(
+    lineIdToWord: Dict[int, Word],
+    uniqueWordIdToWordObjects: Dict[str, List[Word]]
+) -> Tuple[List[int], np.ndarray]:
+    """
+    Build the matrix of cosine dissimilarities between every pair of lines.
+    Returns the line IDs in the order of the matrix rows and the matrix.
+    """
+    lineIds: List[int] = []
+    lines: List[Line] = []
+    for lineId, word in lineIdToWord.items():
+        if word.line is None:
+            logger.error(
+                "Word '%s' has no line, cannot use line ID %d.",
+                word.getUniqueWordId(), lineId
+            )
+            continue
+        lineIds.append(lineId)
+        lines.append(word.line)
+
+    # Only the unique word IDs that appear in these lines get a column, the
+    # rest would be 0 for every line and add nothing to the dot products
+    uniqueWordIdToColumn: Dict[str, int] = {}
+    lineColumns: List[List[int]] = []
+    for line in lines:
+        columns: List[int] = []
+        for word in line.words:
+            uniqueWordId: str = word.getUniqueWordId()
+            if uniqueWordId not in uniqueWordIdToWordObjects:
+                continue
+            column: Optional[int] = uniqueWordIdToColumn.get(uniqueWordId)
+            if column is None:
+                column = len(uniqueWordIdToColumn)
+                uniqueWordIdToColumn[uniqueWordId] = column
+            columns.append(column)
+        lineColumns.append(columns)
+
+    # One contiguous row of word counts per line. The counts are small whole
+    # numbers so float32 holds them and their dot products exactly
+    wordCounts: np.ndarray = np.zeros(
+        (len(lines), len(uniqueWordIdToColumn)), dtype=np.float32
+    )
+    for row, columns in enumerate(lineColumns):
+        for column in columns:
+            wordCounts[row, column] += 1
+
+    # The dot products are exact, so the dissimilarities are computed in
+    # float64 as 1 - (a . b) / (|a| * |b|)
+    dotProducts: np.ndarray = (wordCounts @ wordCounts.T).astype(np.float64)
+    magnitudes: np.ndarray = np.sqrt(np.diag(dotProducts))
+    magnitudeProducts: np.ndarray = np.outer(magnitudes, magnitudes)
+    # Lines without any words have a normalised dot product of 0
+    normalisedDotProducts: np.ndarray = np.divide(
+        dotProducts,
+        magnitudeProducts,
+        out=np.zeros_like(dotProducts),
+        where=magnitudeProducts != 0
+    )
+
+    return lineIds, 1 - normalisedDotProducts
+
+@njit(cache=True)
+def searchMostDifferentCombination(
+    combinedScores: np.ndarray,
+    numInUse: int,
+    initialGains: np.ndarray,
+    newSentenceNum: int,
+    inUseSum: float
+) -> np.ndarray:
     """
-    Generate new combinations of line IDs that include the in-use cloze flashcards.
+    Depth first branch and bound search over the combinations of
+    newSentenceNum of the lines, in the order itertools.combinations would
+    generate them. combinedScores holds the scores between the numInUse
+    in-use lines followed by the lines, initialGains the sum of each line's
+    scores with the in-use lines and inUseSum the sum of the scores between
+    the in-use lines. Returns the indices of the best combination, or an
+    empty array if no combination has a total above 0.
     """
-    newCombinations: List[Tuple[int, ...]] = []
+    pairScores: np.ndarray = combinedScores[numInUse:, numInUse:]
+    numLines: int = pairScores.shape[0]
+    # The most a line can add through a pair with one other new line
+    maxPairScores: np.ndarray = np.zeros(numLines)
+    for i in range(numLines):
+        for j in range(numLines):
+            if i != j and pairScores[i, j] > maxPairScores[i]:
+                maxPairScores[i] = pairScores[i, j]
+
+    # The best total includes the pairs between the in-use lines, the
+    # partial sums below leave them out as they add the same to every
+    # combination
+    currentHighestCosDissimilarity: float = 0.0
+    currentBestCombination: np.ndarray = np.empty(0, dtype=np.int64)
+    # Indices into combinedScores of the in-use lines then the chosen lines
+    combinationIndices: np.ndarray = np.empty(
+        numInUse + newSentenceNum, dtype=np.int64
+    )
+    for i in range(numInUse):
+        combinationIndices[i] = i
+
+    # The state of each depth of the search: the running gain of every line
+    # (the sum of its scores with the lines chosen so far), the score of the
+    # lines chosen so far and the next line to try at that depth
+    gains: np.ndarray = np.empty((newSentenceNum + 1, numLines))
+    gains[0] = initialGains
+    partialSums: np.ndarray = np.zeros(newSentenceNum + 1)
+    nextIndices: np.ndarray = np.zeros(newSentenceNum + 1, dtype=np.int64)
+    chosenIndices: np.ndarray = np.empty(newSentenceNum, dtype=np.int64)
+
+    depth: int = 0
+    while depth >= 0:
+        index: int = nextIndices[depth]
+        remaining: int = newSentenceNum - depth
+        if index > numLines - remaining:
+            depth -= 1
+            continue
 
-    # Generate all combinations of n lines
-    for combination in combinations(lineIds, n):
-        # Create a new combination that includes the in-use cloze flashcards
-        newCombination: Tuple[int, ...] = tuple(inUseIds) + combination
-        newCombinations.append(newCombination)
+        # Each remaining line adds at most its gain plus half of its best
+        # pair score for each of the other remaining lines. Later start
+        # indices have fewer lines left to choose from, so once the bound
+        # fails it fails for the rest of this depth (the tolerance stops
+        # rounding errors pruning a winner)
+        bestAdditions: np.ndarray = np.sort(
+            gains[depth, index:]
+            + (remaining - 1) * maxPairScores[index:] / 2
+        )
+        if (
+            inUseSum + partialSums[depth] + bestAdditions[-remaining:].sum()
+            < currentHighestCosDissimilarity - 1e-9
+        ):
+            depth -= 1
+            continue
 
-    return newCombinations
+        nextIndices[depth] = index + 1
+        chosenIndices[depth] = index
+        partialSum: float = partialSums[depth] + gains[depth, index]
 
-def findMostDifferentCombination(
-    configFilePath: str,
-    combinationsOfLines: List[Tuple[int, ...]],
-    lineIdToWord: Dict[int, Word],
-    calculatedCosDissimilarities: Dict[Tuple[int, int], float],
-    uniqueWordIdToWordObjects: Dict[str, List[Word]],
-    calculatedSentenceLengthScores: Dict[int, float]
-) -> Optional[Tuple[int, ...]]:
-    currentHighestCosDissimilarity: float = 0
-    currentBestCombination: Optional[Tuple[int, ...]] = None
-
-    benefitShorterSentences: bool = getBenefitShorterSentences(configFilePath)
-
-    # For each combination of lines work out the sum of the normalised dot
-    # products of their word vectors and find the combination with the
-    # highest cosine dissimilarity
-    for combination in combinationsOfLines:
-        sumOfCosDissimilarities: float = 0
-        for i, lineIdI in enumerate(combination):
-            for j in range(i + 1, len(combination)):
-                line1: Optional[Line] = lineIdToWord[lineIdI].line
-                line2: Optional[Line] = lineIdToWord[combination[j]].line
-                if line1 is None or line2 is None:
-                    logger.error(
-                        "One of the lines for combination %s is None.",
-                        combination
-                    )
-                    continue
-                cosDissimilarity: float = line1.getCosDissimilarity(
-                    line2,
-                    calculatedCosDissimilarities,
-                    uniqueWordIdToWordObjects
-                )
+        if remaining > 1:
+            gains[depth + 1] = gains[depth] + pairScores[index]
+            partialSums[depth + 1] = partialSum
+            nextIndices[depth + 1] = index + 1
+            depth += 1
+            continue
 
-                if benefitShorterSentences:
-                    cosDissimilarity *= (
-                        line1.getSentenceLengthScore(
-                            calculatedSentenceLengthScores
-                        ) *
-                        line2.getSentenceLengthScore(
-                            calculatedSentenceLengthScores
-                        )
-                    )
+        # The running partial sum is already close to this combination's
+        # score, so only rescore the ones that could beat or tie the best
+        if inUseSum + partialSum < currentHighestCosDissimilarity - 1e-9:
+            continue
 
-                sumOfCosDissimilarities += cosDissimilarity
+        # Rescore the in-use lines followed by the combination over every
+        # pair, in the same order as a plain loop over all of its pairs, so
+        # the total and the tie-breaking match checking every combination
+        for i in range(newSentenceNum):
+            combinationIndices[numInUse + i] = numInUse + chosenIndices[i]
+        sumOfCosDissimilarities: float = 0.0
+        for i in range(numInUse + newSentenceNum):
+            for j in range(i + 1, numInUse + newSentenceNum):
+                sumOfCosDissimilarities += combinedScores[
+                    combinationIndices[i], combinationIndices[j]
+                ]
 
         if sumOfCosDissimilarities > currentHighestCosDissimilarity:
             currentHighestCosDissimilarity = sumOfCosDissimilarities
-            currentBestCombination = combination
+            currentBestCombination = chosenIndices.copy()
 
     return currentBestCombination
 
+def findMostDifferentCombination(
+    benefitShorterSentences: bool,
+    lineIds: List[int],
+    inUseIds: List[int],
+    newSentenceNum: int,
+    lineIdToWord: Dict[int, Word],
+    uniqueWordIdToWordObjects: Dict[str, List[Word]]
+) -> Optional[Tuple[int, ...]]:
+    """
+    Find the combination of newSentenceNum line IDs that, together with the
+    in-use IDs, has the highest sum of pairwise cosine dissimilarities.
+    Searches the combinations depth first in the order
+    itertools.combinations would generate them, pruning any branch that
+    cannot beat the best found so far. Candidates are rescored as the in-use
+    IDs followed by the combination over every pair, so the result (including
+    which combination wins a tie) matches checking every combination.
+    """
+    matrixLineIds, dissimilarities = buildDissimilarityMatrix(
+        lineIdToWord, uniqueWordIdToWordObjects
+    )
+
+    if benefitShorterSentences:
+        sentenceLengthScores: np.ndarray = np.array([
+            lineIdToWord[lineId].line.getSentenceLengthScore()
+            for lineId in matrixLineIds
+        ])
+        dissimilarities *= np.outer(sentenceLengthScores, sentenceLengthScores)
+
+    lineIdToMatrixIndex: Dict[int, int] = {
+        lineId: index for index, lineId in enumerate(matrixLineIds)
+    }
+    # Lines the matrix had to skip (already logged there) cannot be chosen
+    lineIds = [lineId for lineId in lineIds if lineId in lineIdToMatrixIndex]
+    inUseIds = [lineId for lineId in inUseIds if lineId in lineIdToMatrixIndex]
+    lineIndices: List[int] = [lineIdToMatrixIndex[lineId] for lineId in lineIds]
+    inUseIndices: List[int] = [lineIdToMatrixIndex[lineId] for lineId in inUseIds]
+
+    if newSentenceNum == 2 and not inUseIndices:
+        pairScores: np.ndarray = dissimilarities[np.ix_(lineIndices, lineIndices)]
+        # With no in-use lines a pair's score is just its entry in the matrix,
+        # and the upper triangle is in the order itertools.combinations would
+        # generate the pairs, so the first maximum wins ties the same way
+        rows, columns = np.triu_indices(len(lineIndices), k=1)
+        if len(rows) == 0:
+            return None
+        bestPair: int = int(np.argmax(pairScores[rows, columns]))
+        if pairScores[rows[bestPair], columns[bestPair]] <= 0:
+            return None
+        return (lineIds[rows[bestPair]], lineIds[columns[bestPair]])
+
+    numInUse: int = len(inUseIndices)
+    combinedIndices: List[int] = inUseIndices + lineIndices
+    combinedScores: np.ndarray = dissimilarities[
+        np.ix_(combinedIndices, combinedIndices)
+    ]
+    # Each new line starts off with the sum of its pairs with the in-use lines
+    initialGains: np.ndarray = combinedScores[:numInUse, numInUse:].sum(axis=0)
+    inUseSum: float = float(
+        np.triu(combinedScores[:numInUse, :numInUse], 1).sum()
+    )
+
+    bestIndices: np.ndarray = searchMostDifferentCombination(
+        combinedScores, numInUse, initialGains, newSentenceNum, inUseSum
+    )
+    if len(bestIndices) == 0:
+        return None
+
+    return tuple(inUseIds) + tuple(lineIds[index] for index in bestIndices)
+
 def removeInUseIds(
-    combination: Tuple[int, ...], inUseIds: List[int]
+    combination: Tuple[int, ...], inUseIds: Set[int]
 ) -> Tuple[int, ...]:
     """
     Remove the in-use IDs from the combination.
     """
+    if not inUseIds:
+        return combination
     return tuple(id_ for id_ in combination if id_ not in inUseIds)
 
 def highestProportionOfNewWordsAlgorithm(
@@ -339,28 +540,33 @@ def highestProportionOfNewWordsAlgorithm(
     )
     numFlashcardsPerWord: int = getNumFlashcardsPerWord(configFilePath)
 
-    # List of words that have been used in any used cloze flashcards
-    seenWords: List[str] = []
-
-    for word in (word for flashcards in inUseClozeFlashcards.values()
-                 for flashcard in flashcards
-                 for word in flashcard.getWords()):
-        uniqueWordId: str = word.getUniqueWordId()
-        if uniqueWordId not in seenWords:
-            seenWords.append(uniqueWordId)
+    # Set of words that have been used in any used cloze flashcards
+    seenWords: Set[str] = {
+        word.getUniqueWordId()
+        for flashcards in inUseClozeFlashcards.values()
+        for flashcard in flashcards
+        for word in flashcard.getWords()
+    }
 
     calculatedSentenceProportions: Dict[int, float] = {}
 
     for uniqueWordId, words in uniqueWordIdToWordObjects.items():
-        # Create a list of the words that are not already in use
-        unusedWords: List[Word] = []
+        if hasEnoughClozeFlashcards(
+            uniqueWordId, wordToSimpleClozeFlashcards, numFlashcardsPerWord
+        ):
+            continue
 
         inUseClozeFlashcardsForWord: List[ClozeFlashcard] = (
             inUseClozeFlashcards.get(uniqueWordId, [])
         )
-        for word in words:
-            if not word.thisInstanceInClozeFlashcards(inUseClozeFlashcardsForWord):
-                unusedWords.append(word)
+        inUseInstances: Set[Tuple[int, int]] = ClozeFlashcard.getInstances(
+            inUseClozeFlashcardsForWord
+        )
+        # Create a list of the words that are not already in use
+        unusedWords: List[Word] = [
+            word for word in words
+            if not word.thisInstanceInClozeFlashcards(inUseInstances)
+        ]
 
         wordToSimpleClozeFlashcards, toContinue = (
             preAlgorithmChecks(
@@ -374,15 +580,19 @@ def highestProportionOfNewWordsAlgorithm(
         if toContinue:
             continue
 
-        unusedWords.sort(
-            key=lambda w: (
-                w.getSentenceNewWordProportion(seenWords, calculatedSentenceProportions),
-                w.getUniqueWordId()
-            ),
-            reverse=True
+        # Only the top numFlashcardsPerWord are needed, in the same order
+        # (ties included) that sorting all of them would give. Every instance
+        # shares this unique word ID, so only the proportion decides the order
+        bestWords: List[Word] = heapq.nlargest(
+            numFlashcardsPerWord,
+            unusedWords,
+            key=lambda w: w.getSentenceNewWordProportion(
+                seenWords, calculatedSentenceProportions
+            )
         )
 
-        for word in unusedWords[:numFlashcardsPerWord]:
+        newSimpleClozeFlashcards: List[SimpleClozeFlashcard] = []
+        for word in bestWords:
             if word.line is None or word.index is None:
                 logger.error(
                     "Word '%s' has no line or word index, "
@@ -395,10 +605,11 @@ def highestProportionOfNewWordsAlgorithm(
                 word.line, word.index
             ).getSimpleClozeFlashcard()
 
-            if word.getUniqueWordId() not in wordToSimpleClozeFlashcards:
-                wordToSimpleClozeFlashcards[word.getUniqueWordId()] = []
-            wordToSimpleClozeFlashcards[word.getUniqueWordId()].append(
-                simpleClozeFlashcard
+            newSimpleClozeFlashcards.append(simpleClozeFlashcard)
+
+        if newSimpleClozeFlashcards:
+            wordToSimpleClozeFlashcards.setdefault(uniqueWordId, []).extend(
+                newSimpleClozeFlashcards
             )
 
     return wordToSimpleClozeFlashcards
@@ -1,14 +1,11 @@
-import cProfile
-import io
 import logging
 import os
-import pstats
-import sys
+import re
+from operator import attrgetter
 from typing import List, Tuple
 
 import click
 
-from terminalUtils import runAlgorithm
 from configUtils import (
     getConfigList,
     getCurrentConfigName,
@@ -192,7 +189,7 @@ def getCurrentOutputOrder():
     """Get the output order for the current config."""
     configFilePath: str = getCurrentConfigFilePath()
     orders = getOutputOrder(configFilePath)
-    orderValues = [order.value for order in orders]
+    orderValues = list(map(attrgetter('value'), orders))
     click.echo(f"Output order: {', '.join(orderValues)}")
 
 @currentSettings.command(name='bury-words')
@@ -214,59 +211,67 @@ def run():
 def runAll() -> None:
     """Run the full app with the current config."""
     configFilePath: str = getCurrentConfigFilePath()
-    if configFilePath.startswith("error:"):
-        logger.error(configFilePath)
-        return
     # Proceed with running the app using the config file
     logger.info("Running app with config: %s", configFilePath)
 
+    # Imported here so the other commands do not have to load the
+    # algorithms and their numeric dependencies
+    from terminalUtils import runAlgorithm
     runAlgorithm(configFilePath)
 
-if __name__ == "__main__":
-    logging.basicConfig(
-        level=logging.WARNING, # Options are DEBUG, INFO, WARNING, ERROR, CRITICAL
-        format='%(levelname)s: %(message)s'
-    )
-
-    isDev = os.getenv("DEV_MODE", "false").lower() == "true"
-
-    code_profiler = None
+def runAllWithProfiler() -> None:
+    """
+    Run the app with the current config under cProfile, print the 20
+    slowest of the app's own functions by cumulative and by internal time
+    and save the full results to profile_results.prof.
+    """
+    # Only pull in the profiling modules when profiling is actually requested
+    import cProfile
+    import io
+    import pstats
+
+    codeProfiler = cProfile.Profile()
+    codeProfiler.enable()
+
+    # Do what the "runAll" command does (copy of code because click
+    # stops the script after command execution)
+    configFilePath: str = getCurrentConfigFilePath()
+    # Proceed with running the app using the config file
+    logger.info("Running app with config: %s", configFilePath)
 
-    if isDev:
-        # Create profiler
-        code_profiler = cProfile.Profile()
+    from terminalUtils import runAlgorithm
+    runAlgorithm(configFilePath)
 
-        # Start profiling
-        code_profiler.enable()
+    codeProfiler.disable()
 
-    if isDev:
-        # Do what the "runAll" command does (copy of code because click
-        # stops the script after command execution)
-        configFilePath: str = getCurrentConfigFilePath()
-        if configFilePath.startswith("error:"):
-            logger.error(configFilePath)
-            sys.exit(1)
-        # Proceed with running the app using the config file
-        logger.info("Running app with config: %s", configFilePath)
+    # Create a string buffer to capture output
+    s = io.StringIO()
+    ps = pstats.Stats(codeProfiler, stream=s)
 
-        runAlgorithm(configFilePath)
-    else:
-        cli()
+    # Only list the app's own modules, not the standard library and dependencies
+    appModulesPattern: str = re.escape(
+        os.path.dirname(os.path.abspath(__file__)) + os.sep
+    ) + r"\w+\.py"
 
-    if code_profiler is not None:
-        # Stop profiling
-        code_profiler.disable()
+    # Cumulative time shows which calls the run is spent under, internal
+    # time shows which functions do the work themselves
+    for sortKey in ('cumulative', 'tottime'):
+        ps.sort_stats(sortKey)
+        ps.print_stats(appModulesPattern, 20)
 
-        # Create a string buffer to capture output
-        s = io.StringIO()
-        ps = pstats.Stats(code_profiler, stream=s)
+    # Print the results
+    print(s.getvalue())
 
-        # Sort by cumulative time and print top 20 functions
-        ps.sort_stats('cumulative')
-        ps.print_stats(20)
+    # You can also save to file
+    ps.dump_stats('profile_results.prof')
 
-        # Print the results
-        print(s.getvalue())
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.WARNING, # Options are DEBUG, INFO, WARNING, ERROR, CRITICAL
+        format='%(levelname)s: %(message)s'
+    )
 
-        # You can also save to file
-        ps.dump_stats('profile_results.prof')
+    if os.getenv("DEV_MODE", "false").lower() == "true":
+        runAllWithProfiler()
+    else:
+        cli()
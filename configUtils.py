@@ -1,18 +1,29 @@
+import copy
 import logging
 import json
 import os
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from readWrite import readJsonFile, writeJsonFile
 from resources import (
     ClozeChoosingAlgorithm,
     OutputOrder,
+    GeneratorConfig,
     GeneratorConfigDefaults,
     GeneratorConfigMapping
 )
 
 logger = logging.getLogger(__name__)
 
+appConfigFilePath: str = "appConfig.json"
+
+# Parsed config files (including appConfig.json) by path, along with the
+# (modification time, size) of the file when it was parsed
+configJsonCache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+# Settings read from each generator config file, keyed the same way
+generatorConfigCache: Dict[str, Tuple[Tuple[int, int], GeneratorConfig]] = {}
+
 def validateConfigObject(config: Any) -> bool:
     """
     Validates the configuration object.
@@ -35,9 +46,11 @@ def getConfigList() -> List[str]:
 
 def writeAppConfigJsonFile(appConfigJson: Any) -> None:
     """
-    Writes the appConfig.json file with the provided JSON object.
+    Writes the appConfig.json file with the provided JSON object
+    and drops its cached copy.
     """
-    writeJsonFile("appConfig.json", appConfigJson)
+    configJsonCache.pop(appConfigFilePath, None)
+    writeJsonFile(appConfigFilePath, appConfigJson)
 
 def resetConfigsList() -> None:
     appConfigJson = getAppConfigJson()
@@ -108,10 +121,31 @@ def getCurrentConfigIndex() -> int:
 
     return currentConfigIndex
 
+def getValidCurrentConfig() -> Optional[Any]:
+    """
+    Returns the entry of the currently active configuration from a single
+    read of appConfig.json, or None if appConfig.json needs repairing.
+    """
+    appConfigJson = getAppConfigJson()
+    configs = appConfigJson.get("configs")
+    currentConfigIndex = appConfigJson.get("currentConfigIndex")
+    if (
+        not configs
+        or not isinstance(currentConfigIndex, int)
+        or not 0 <= currentConfigIndex < len(configs)
+    ):
+        return None
+    return configs[currentConfigIndex]
+
 def getCurrentConfigName() -> str:
     """
     Returns the name of the currently active configuration.
     """
+    currentConfig: Optional[Any] = getValidCurrentConfig()
+    if currentConfig is not None and currentConfig.get("name"):
+        return currentConfig["name"]
+
+    # Fall back to the lookups that repair appConfig.json
     currentConfigIndex = getCurrentConfigIndex()
     configs = getConfigs()
 
@@ -133,9 +167,20 @@ def readAppConfigJsonFile() -> Optional[str]:
     """
     Reads the appConfig.json file and returns its content as a string.
     """
-    return readJsonFile("appConfig.json")
+    return readJsonFile(appConfigFilePath)
 
 def getAppConfigJson() -> Any:
+    """
+    Returns the parsed appConfig.json.
+    The parsed file is cached until the file changes on disk.
+    """
+    fileVersion: Optional[Tuple[int, int]] = getFileVersion(appConfigFilePath)
+    cachedAppConfig = configJsonCache.get(appConfigFilePath)
+    if fileVersion is not None and cachedAppConfig is not None:
+        cachedFileVersion, cachedAppConfigJson = cachedAppConfig
+        if cachedFileVersion == fileVersion:
+            return copy.deepcopy(cachedAppConfigJson)
+
     appConfigJsonString: Optional[str] = readAppConfigJsonFile()
     if not appConfigJsonString:
         logger.warning("appConfig.json not found, resetting to default")
@@ -154,7 +199,10 @@ def getAppConfigJson() -> Any:
             "currentConfigIndex": 0
         }
 
-    return json.loads(appConfigJsonString)
+    appConfigJson = json.loads(appConfigJsonString)
+    if fileVersion is not None:
+        configJsonCache[appConfigFilePath] = (fileVersion, copy.deepcopy(appConfigJson))
+    return appConfigJson
 
 def getConfigFilePath(configName: str) -> str:
     configs = getConfigs()
@@ -178,6 +226,14 @@ def getCurrentConfigFilePath() -> str:
     """
     Returns the file path of the currently active configuration.
     """
+    currentConfig: Optional[Any] = getValidCurrentConfig()
+    if (
+        currentConfig is not None
+        and currentConfig.get("name")
+        and currentConfig.get("file")
+    ):
+        return os.path.join("generatorConfigs", currentConfig["file"])
+
     currentConfigName: str = getCurrentConfigName()
     return getConfigFilePath(currentConfigName)
 
@@ -199,10 +255,30 @@ def setCurrentConfig(name: str) -> None:
             return
     logger.error("Config '%s' not found", name)
 
+def getFileVersion(filePath: str) -> Optional[Tuple[int, int]]:
+    """
+    Returns the modification time and size of the file, or None if it
+    does not exist.
+    """
+    try:
+        fileStat: os.stat_result = os.stat(filePath)
+    except OSError:
+        return None
+    return fileStat.st_mtime_ns, fileStat.st_size
+
 def getConfigJson(configFilePath: str) -> Any:
     """
     Returns the algorithm configuration from the specified file.
+    The parsed file is cached until the file changes on disk.
     """
+    fileVersion: Optional[Tuple[int, int]] = getFileVersion(configFilePath)
+    cachedConfig = configJsonCache.get(configFilePath)
+    if fileVersion is not None and cachedConfig is not None:
+        cachedFileVersion, cachedConfigJson = cachedConfig
+        if cachedFileVersion == fileVersion:
+            # Callers update the returned config, so never hand out the cached one
+            return copy.deepcopy(cachedConfigJson)
+
     configJsonString: Optional[str] = readJsonFile(configFilePath)
     if configJsonString is None:
         logger.error("Config file %s not found, resetting to default", configFilePath)
@@ -211,11 +287,22 @@ def getConfigJson(configFilePath: str) -> Any:
 
     try:
         configJson = json.loads(configJsonString)
-        return configJson
     except json.JSONDecodeError as e:
         logger.error("Failed to parse config file %s: %s", configFilePath, e)
         return None
 
+    if fileVersion is not None:
+        configJsonCache[configFilePath] = (fileVersion, copy.deepcopy(configJson))
+    return configJson
+
+def writeConfigJsonFile(configFilePath: str, configJson: Any) -> None:
+    """
+    Writes the configuration file and drops its cached copy.
+    """
+    configJsonCache.pop(configFilePath, None)
+    generatorConfigCache.pop(configFilePath, None)
+    writeJsonFile(configFilePath, configJson)
+
 def createConfigMapping(configName: str, configFilePath: str) -> None:
     """
     Creates a mapping for the configuration in the appConfig.json.
@@ -259,7 +346,7 @@ def resetConfigFile(filePath: str) -> None:
         resetConfigFile("default.json")
         defaultConfig = {}
 
-    writeJsonFile(filePath, defaultConfig)
+    writeConfigJsonFile(filePath, defaultConfig)
     logger.info("Reset config file %s to default state", filePath)
 
 def createAndUseNewConfig(newConfigName: Optional[str] = None) -> str:
@@ -298,8 +385,9 @@ def deleteConfigByName(name: str, cascade: bool = False) -> None:
 
     configFilePath: str = getConfigFilePath(name)
 
-    inputFilePath: str = getInputFilePath(configFilePath)
-    outputFilePath: str = getOutputFilePath(configFilePath)
+    generatorConfig: GeneratorConfig = getGeneratorConfig(configFilePath)
+    inputFilePath: str = generatorConfig.inputFilePath
+    outputFilePath: str = generatorConfig.outputFilePath
 
     if cascade:
         if os.path.exists(inputFilePath):
@@ -323,82 +411,113 @@ def deleteConfigByName(name: str, cascade: bool = False) -> None:
             break
 
 
-def getInputFilePath(configFilePath: str) -> str:
+def getGeneratorConfig(configFilePath: str) -> GeneratorConfig:
     """
-    Returns the input file path from the configuration file.
+    Returns all of the settings from the configuration file, read in one go.
+    The settings are cached until the file changes on disk.
     """
+    fileVersion: Optional[Tuple[int, int]] = getFileVersion(configFilePath)
+    cachedGeneratorConfig = generatorConfigCache.get(configFilePath)
+    if fileVersion is not None and cachedGeneratorConfig is not None:
+        cachedFileVersion, generatorConfig = cachedGeneratorConfig
+        if cachedFileVersion == fileVersion:
+            return generatorConfig
+
     configJson = getConfigJson(configFilePath)
     if configJson is None:
-        return GeneratorConfigDefaults.inputFilePath
-    return configJson.get("inputFilePath", GeneratorConfigDefaults.inputFilePath)
+        configJson = {}
+
+    # A bad value for one setting must not make the others unreadable
+    clozeChoosingAlgorithm: ClozeChoosingAlgorithm = (
+        GeneratorConfigDefaults.clozeChoosingAlgorithm
+    )
+    clozeChoosingAlgorithmString: Optional[str] = configJson.get("clozeChoosingAlgorithm")
+    if clozeChoosingAlgorithmString:
+        try:
+            clozeChoosingAlgorithm = ClozeChoosingAlgorithm(clozeChoosingAlgorithmString)
+        except ValueError:
+            logger.warning(
+                "Invalid cloze choosing algorithm string: %s, using the default",
+                clozeChoosingAlgorithmString
+            )
+
+    outputOrderEnums: List[OutputOrder] = []
+    for order in configJson.get("outputOrder", GeneratorConfigDefaults.outputOrder):
+        try:
+            outputOrderEnums.append(OutputOrder(order))
+        except ValueError:
+            logger.warning("Invalid output order string: %s, skipping", order)
+
+    wordsToBury: Any = configJson.get("wordsToBury", GeneratorConfigDefaults.wordsToBury)
+
+    generatorConfig = GeneratorConfig(
+        inputFilePath=configJson.get(
+            "inputFilePath", GeneratorConfigDefaults.inputFilePath
+        ),
+        outputFilePath=configJson.get(
+            "outputFilePath", GeneratorConfigDefaults.outputFilePath
+        ),
+        clozeChoosingAlgorithm=clozeChoosingAlgorithm,
+        numFlashcardsPerWord=configJson.get(
+            "numFlashcardsPerWord", GeneratorConfigDefaults.numFlashcardsPerWord
+        ),
+        benefitShorterSentences=configJson.get(
+            "benefitShorterSentences", GeneratorConfigDefaults.benefitShorterSentences
+        ),
+        outputOrder=tuple(outputOrderEnums),
+        # Only a list is frozen into a tuple, anything else typed into the
+        # file by hand is kept as it is
+        wordsToBury=(
+            tuple(wordsToBury) if isinstance(wordsToBury, list) else wordsToBury
+        )
+    )
+
+    if fileVersion is not None:
+        generatorConfigCache[configFilePath] = (fileVersion, generatorConfig)
+    return generatorConfig
+
+def getInputFilePath(configFilePath: str) -> str:
+    """
+    Returns the input file path from the configuration file.
+    """
+    return getGeneratorConfig(configFilePath).inputFilePath
 
 def getOutputFilePath(configFilePath: str) -> str:
     """
     Returns the output file path from the configuration file.
     """
-    configJson = getConfigJson(configFilePath)
-    if configJson is None:
-        return GeneratorConfigDefaults.outputFilePath
-    return configJson.get("outputFilePath", GeneratorConfigDefaults.outputFilePath)
+    return getGeneratorConfig(configFilePath).outputFilePath
 
 def getClozeChoosingAlgorithm(configFilePath: str) -> ClozeChoosingAlgorithm:
     """
     Returns the cloze choosing algorithm from the configuration file.
     """
-    configJson = getConfigJson(configFilePath)
-    if configJson is None:
-        return GeneratorConfigDefaults.clozeChoosingAlgorithm
-    clozeChoosingAlgorithmString: Optional[str] = configJson.get("clozeChoosingAlgorithm")
-    return (
-        ClozeChoosingAlgorithm(clozeChoosingAlgorithmString)
-        if clozeChoosingAlgorithmString else GeneratorConfigDefaults.clozeChoosingAlgorithm
-    )
+    return getGeneratorConfig(configFilePath).clozeChoosingAlgorithm
 
 def getNumFlashcardsPerWord(configFilePath: str) -> int:
     """
     Returns the number of flashcards per word from the configuration file.
     """
-    configJson = getConfigJson(configFilePath)
-    if configJson is None:
-        return GeneratorConfigDefaults.numFlashcardsPerWord
-    return configJson.get("numFlashcardsPerWord", GeneratorConfigDefaults.numFlashcardsPerWord)
+    return getGeneratorConfig(configFilePath).numFlashcardsPerWord
 
 def getBenefitShorterSentences(configFilePath: str) -> bool:
     """
     Returns whether to benefit shorter sentences from the configuration file.
     """
-    configJson = getConfigJson(configFilePath)
-    return configJson.get(
-        "benefitShorterSentences", 
-        GeneratorConfigDefaults.benefitShorterSentences
-    )
+    return getGeneratorConfig(configFilePath).benefitShorterSentences
 
 def getOutputOrder(configFilePath: str) -> List[OutputOrder]:
     """
     Returns the output order from the configuration file.
     """
-    configJson = getConfigJson(configFilePath)
-    if configJson is None:
-        return GeneratorConfigDefaults.outputOrder
-    outputOrderStrings: List[str] = configJson.get("outputOrder", [])
-
-    outputOrderEnums: List[OutputOrder] = []
-    for order in outputOrderStrings:
-        try:
-            outputOrderEnums.append(OutputOrder(order))
-        except ValueError:
-            logger.warning("Invalid output order string: %s, skipping", order)
-
-    return outputOrderEnums
+    return list(getGeneratorConfig(configFilePath).outputOrder)
 
 def getWordsToBury(configFilePath: str) -> List[str]:
     """
     Returns the list of words to bury from the configuration file.
     """
-    configJson = getConfigJson(configFilePath)
-    if configJson is None:
-        return GeneratorConfigDefaults.wordsToBury
-    return configJson.get("wordsToBury", GeneratorConfigDefaults.wordsToBury)
+    wordsToBury: Any = getGeneratorConfig(configFilePath).wordsToBury
+    return list(wordsToBury) if isinstance(wordsToBury, tuple) else wordsToBury
 
 def updateConfigFile(configName: str, update: Any) -> None:
     """
@@ -411,7 +530,7 @@ def updateConfigFile(configName: str, update: Any) -> None:
     configFilePath: str = getConfigFilePath(configName)
     configJson = getConfigJson(configFilePath)
     configJson.update(update)
-    writeJsonFile(configFilePath, configJson)
+    writeConfigJsonFile(configFilePath, configJson)
 
 def setConfigInputFile(configName: str, path: str) -> None:
     """
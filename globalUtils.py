@@ -13,23 +13,31 @@ from resources import Resources, PunctuationWordPosition
 
 logger = logging.getLogger(__name__)
 
+# Compiled once here rather than rebuilt for every word of every sentence
+escapedPunctuationChars: str = re.escape(Resources.punctuationChars)
+punctuationPattern: re.Pattern = re.compile(
+    f"([{escapedPunctuationChars}]*)(.*?)([{escapedPunctuationChars}]*)$"
+)
+
+arabicPunctuationChars: str = "،؛؟"
+arabicAccentChars: str = "ًٌٍَُِْ"
+moreArabicAccentChars: str = "ّ"
+arabicChars: frozenset = frozenset(
+    arabicPunctuationChars + arabicAccentChars + moreArabicAccentChars
+)
+
+# Characters accepted in a sentence line besides letters, digits and whitespace
+acceptedSymbolChars: frozenset = arabicChars | frozenset("_" + Resources.punctuationChars)
+
 def getUniqueWordIdToWordObjects(configFilePath: str) -> Dict[str, List[Word]]:
     """
     Get a mapping of unique word IDs to their corresponding Word objects.
     """
     inputFilePath: str = getInputFilePath(configFilePath)
-    sentenceLines: Optional[List[str]] = prepareSentenceLines(inputFilePath)
-
-    if sentenceLines is None:
-        return {}
-
     uniqueWordIdToWordObjects: Dict[str, List[Word]] = {}
 
-    for line in sentenceLines:
-        parseSentenceLine(
-            line,
-            uniqueWordIdToWordObjects
-        )
+    if not parseSentenceLines(inputFilePath, uniqueWordIdToWordObjects):
+        return {}
 
     addInUseClozeFlashcardWords(
         configFilePath,
@@ -77,18 +85,48 @@ def getInUseClozeFlashcards(configFilePath: str) -> Dict[str, List[ClozeFlashcar
         existingClozeFlashcardsJsonFileString,
     )
 
-def prepareSentenceLines(inputFilePath: str) -> Optional[List[str]]:
+def countInUseClozeFlashcards(configFilePath: str) -> int:
     """
-    Read sentences from a file and validate them.
-    Returns a list of valid sentences.
+    Count the in-use cloze flashcards in the output file without building
+    ClozeFlashcard objects for them.
     """
-    logger.info("Reading sentences from '%s'...", inputFilePath)
-    sentenceLines: List[str] = readLines(inputFilePath)
+    outputFilePath: str = getOutputFilePath(configFilePath)
 
-    # Check for invalid lines in the sentences file
-    logger.info("Checking for invalid lines in '%s'...", inputFilePath)
+    existingClozeFlashcardsJsonFileString: Optional[str] = readJsonFile(outputFilePath)
+    if existingClozeFlashcardsJsonFileString is None:
+        return 0
 
-    invalidLines: List[str] = findInvalidLines(sentenceLines)
+    try:
+        existingClozeFlashcards: Dict[str, List[Dict[str, str]]] = json.loads(
+            existingClozeFlashcardsJsonFileString
+        )
+    except json.JSONDecodeError:
+        return 0
+
+    return sum(
+        clozeFlashcard['inUse'] == "True"
+        for clozeFlashcards in existingClozeFlashcards.values()
+        for clozeFlashcard in clozeFlashcards
+    )
+
+def parseSentenceLines(
+    inputFilePath: str,
+    uniqueWordIdToWordObjects: Dict[str, List[Word]]
+) -> bool:
+    """
+    Read sentences from a file, validating and parsing each line as it is
+    read. Returns whether all of the lines were valid.
+    """
+    logger.info("Reading and checking sentences from '%s'...", inputFilePath)
+
+    invalidLines: List[str] = []
+    for line in readLines(inputFilePath):
+        if isInvalidLine(line):
+            invalidLines.append(line)
+        elif not invalidLines:
+            # Once a line is invalid none of the sentences are used,
+            # so only keep reading to report the other invalid lines
+            parseSentenceLine(line, uniqueWordIdToWordObjects)
 
     if invalidLines:
         logger.error("Invalid sentence lines found.")
@@ -96,10 +134,10 @@ def prepareSentenceLines(inputFilePath: str) -> Optional[List[str]]:
         if logger.isEnabledFor(logging.DEBUG):
             printFoundInvalidLines(invalidLines)
 
-        return None
+        return False
 
     logger.info("Sentence lines are valid.")
-    return sentenceLines
+    return True
 
 def parseSentenceLine(
         line: str,
@@ -159,15 +197,9 @@ def addInUseClozeFlashcardWords(
                 wordObject: Word = clozeFlashcard.getFirstClozeWord()
                 uniqueWordIdToWordObjects[word].append(wordObject)
 
-def isArabic(c: str) -> bool:
-    arabicPunctuationChars = "،؛؟"
-    arabicAccentChars = "ًٌٍَُِْ"
-    moreArabicAccentChars = "ّ"
-    return c in arabicPunctuationChars or c in arabicAccentChars or c in moreArabicAccentChars
-
-def findInvalidLines(lines: List[str]) -> List[str]:
+def isInvalidLine(line: str) -> bool:
     """
-    Find invalid lines in a list of lines.
+    Check if a line is invalid.
     A line is invalid if:
     - it has no words,
     - it has multiple spaces back to back,
@@ -175,21 +207,15 @@ def findInvalidLines(lines: List[str]) -> List[str]:
     - it has characters that are not letters, numbers, " ", "_", or valid
       punctuation in the punctuation characters resource.
     """
-    invalidLines: List[str] = []
-
-    for line in lines:
-        # Check for multiple spaces, leading/trailing whitespace, and invalid characters
-        noAlphabeticalCharacters = not any(c.isalpha() for c in line)
-        hasDoubleSpace = '  ' in line
-        notAllAcceptedCharacters = not all(c.isalpha() or c.isdigit() or c.isspace() or c == "_"
-                   or isArabic(c) or c in Resources.punctuationChars for c in line)
+    # Check for multiple spaces, leading/trailing whitespace, and invalid characters
+    noAlphabeticalCharacters = not any(c.isalpha() for c in line)
+    hasDoubleSpace = '  ' in line
+    notAllAcceptedCharacters = not all(c.isalpha() or c.isdigit() or c.isspace()
+               or c in acceptedSymbolChars for c in line)
 
-        if (noAlphabeticalCharacters or
+    return (noAlphabeticalCharacters or
             hasDoubleSpace or
-            notAllAcceptedCharacters):
-            invalidLines.append(line)
-
-    return invalidLines
+            notAllAcceptedCharacters)
 
 def printFoundInvalidLines(invalidLines: List[str]) -> None:
     """
@@ -253,9 +279,7 @@ def processPunctuation(
     # If the subString starts or ends with a string of punctuation
     # using regex to find punctuation at the start and end
     # punctuation to look for is in the punctuation characters resource
-    allowedPunctuation = Resources.punctuationChars
-    pattern = f"([{re.escape(allowedPunctuation)}]*)(.*?)([{re.escape(allowedPunctuation)}]*)$"
-    match = re.match(pattern, subString)
+    match = punctuationPattern.match(subString)
     if not match:
         return subString, False
 
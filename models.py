@@ -3,9 +3,8 @@ import logging
 import math
 import re
 import sys
-from typing import Dict, List, Optional, Tuple
-
-import numpy as np
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
 
 from resources import (
     PunctuationWordPosition,
@@ -43,16 +42,15 @@ class Word:
         return self.uniqueWordId
 
     def thisInstanceInClozeFlashcards(
-        self, clozeFlashcards: List['ClozeFlashcard']
+        self, clozeFlashcardInstances: Set[Tuple[int, int]]
     ) -> bool:
         """
-        Check if this instance of the word is in the list of cloze flashcards.
+        Check if this instance of the word is in the set of
+        (line ID, word index) pairs of some cloze flashcards.
         """
-        for clozeFlashcard in clozeFlashcards:
-            if (clozeFlashcard.line == self.line
-                and clozeFlashcard.wordIndex == self.index):
-                return True
-        return False
+        if self.line is None:
+            return False
+        return (self.line.id, self.index) in clozeFlashcardInstances
 
     @staticmethod
     def addClozeIdToString(
@@ -84,7 +82,7 @@ class Word:
 
     def getSentenceNewWordProportion(
         self,
-        seenWords: List[str],
+        seenWords: Set[str],
         calculatedSentenceProportions: Dict[int, float]
     ) -> float:
         if self.line is None:
@@ -198,9 +196,6 @@ class Punctuation:
         self.wordPosition: PunctuationWordPosition = wordPosition
 
 class Line:
-    # calculatedCosDissimilarities: Dict[Tuple[int, int], float] = {}
-    # calculatedSentenceLengthScores: Dict[int, float] = {}
-
     def __init__(
         self, words: List['Word'],
         punctuationDict: Dict[int, List['Punctuation']]
@@ -212,7 +207,6 @@ class Line:
 
         self.asString: Optional[str] = None
         self.id: int = int(hashlib.sha256(str(self).encode()).hexdigest()[:8], 16)
-        self.wordVector: Optional[np.ndarray] = None
 
     def __str__(self) -> str:
         if self.asString is None:
@@ -228,88 +222,20 @@ class Line:
             return NotImplemented
         return self.id == other.id
 
-    def getUniqueWordIdVector(
-        self, uniqueWordIdToWordObjects: Dict[str, List['Word']]
-    ) -> np.ndarray:
-        """
-        Generate a word vector for the line.
-        """
-        if self.wordVector is not None:
-            return self.wordVector
-
-        # Initialize the word vector as a dictionary
-        # where keys are the punctuationless words and values are their counts
-        wordCounts: Dict[str, int] = {
-            uniqueWordId: 0
-            for uniqueWordId in uniqueWordIdToWordObjects.keys()
-        }
-
-        # Iterate through the words and update the word vector
-        for word in self.words:
-            uniqueWordId: str = word.getUniqueWordId()
-            if uniqueWordId in wordCounts:
-                wordCounts[uniqueWordId] += 1
-
-        # Convert the dictionary to a numpy array for easier manipulation
-        self.wordVector = np.array(list(wordCounts.values()), dtype=float)
-
-        return self.wordVector
-
-    def getCosDissimilarity(
-            self,
-            otherLine: 'Line',
-            calculatedCosDissimilarities: Dict[Tuple[int, int], float],
-            uniqueWordIdToWordObjects: Dict[str, List['Word']]
-        ) -> float:
-        """
-        Calculate the cosine dissimilarity between this line and another line.
-        """
-        # Check if the cosine dissimilarity has already been calculated
-        if (self.id, otherLine.id) in calculatedCosDissimilarities:
-            return calculatedCosDissimilarities[(self.id, otherLine.id)]
-
-        vector1: np.ndarray = self.getUniqueWordIdVector(
-            uniqueWordIdToWordObjects
-        )
-        vector2: np.ndarray = otherLine.getUniqueWordIdVector(
-            uniqueWordIdToWordObjects
-        )
-
-        # Calculate the dot product
-        dotProduct: float = np.dot(vector1, vector2)
-        # Calculate the magnitudes of the vectors
-        magnitude1: float = float(np.linalg.norm(vector1))
-        magnitude2: float = float(np.linalg.norm(vector2))
-        # Calculate the normalized dot product
-        if magnitude1 == 0 or magnitude2 == 0:
-            normalisedDotProduct: float = 0
-        else:
-            normalisedDotProduct = dotProduct / (magnitude1 * magnitude2)
-
-        # Calculate the cosine dissimilarity
-        cosineDissimilarity: float = 1 - normalisedDotProduct
-
-        # Store the calculated dissimilarity for future use
-        calculatedCosDissimilarities[(
-            self.id,
-            otherLine.id
-        )] = cosineDissimilarity
-
-        return cosineDissimilarity
-
-    def getSentenceLengthScore(self, calculatedSentenceLengthScores: Dict[int, float]) -> float:
+    def getSentenceLengthScore(self) -> float:
         """
         Calculate a score based on the length of the sentence.
         Shorter sentences get a higher score with a reciprocal of exponential curve.
         """
-        length = len(self.words)
+        return Line.getSentenceLengthScoreForLength(len(self.words))
 
-        if calculatedSentenceLengthScores.get(length) is not None:
-            return calculatedSentenceLengthScores[length]
-
-        sentenceLengthScore = 1 / (math.exp((3 * length / 25) ** 2))
-        calculatedSentenceLengthScores[length] = sentenceLengthScore
-        return sentenceLengthScore
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def getSentenceLengthScoreForLength(length: int) -> float:
+        """
+        Calculate the sentence length score for a sentence with length words.
+        """
+        return 1 / (math.exp((3 * length / 25) ** 2))
 
     @staticmethod
     def stringifyWordsAndPunctuation(
@@ -376,6 +302,18 @@ class ClozeFlashcard:
             return NotImplemented
         return self.simpleClozeFlashcard == other.simpleClozeFlashcard
 
+    @staticmethod
+    def getInstances(
+        clozeFlashcards: List['ClozeFlashcard']
+    ) -> Set[Tuple[int, int]]:
+        """
+        Get the (line ID, word index) pairs of the cloze flashcards.
+        """
+        return {
+            (clozeFlashcard.line.id, clozeFlashcard.wordIndex)
+            for clozeFlashcard in clozeFlashcards
+        }
+
     def getSimpleClozeFlashcard(self) -> 'SimpleClozeFlashcard':
         if self.simpleClozeFlashcard is not None:
             return self.simpleClozeFlashcard
@@ -586,6 +524,16 @@ class ClozeFlashcard:
 class SimpleClozeFlashcard:
     # wordToFlashcards: Dict[str, List['SimpleClozeFlashcard']] = {}
 
+    # Every output flashcard is one of these, so leave out the per-instance dict
+    __slots__ = (
+        'beforeCloze',
+        'midCloze',
+        'afterCloze',
+        'clozePart1',
+        'clozePart2',
+        'inUse'
+    )
+
     def __init__(
         self,
         beforeCloze: str,
@@ -613,6 +561,16 @@ class SimpleClozeFlashcard:
             self.clozePart2 == other.clozePart2
         )
 
+    def __hash__(self) -> int:
+        # Hash the same fields __eq__ compares so equal flashcards collide
+        return hash((
+            self.beforeCloze,
+            self.midCloze,
+            self.afterCloze,
+            self.clozePart1,
+            self.clozePart2
+        ))
+
     def toJsonableDict(self) -> Dict[str, str]:
         """Convert SimpleClozeFlashcard to dictionary for JSON serialization."""
         return {
@@ -1,18 +1,23 @@
 import logging
 import json
-from typing import Any, List, Optional
+from typing import Any, Callable, Iterator, Optional
 
 logger = logging.getLogger(__name__)
 
-def readLines(filePath: str) -> List[str]:
+def readLines(filePath: str) -> Iterator[str]:
     """
-    Read lines from a file and return them as a list of strings.
+    Read lines from a file, yielding each non-empty one stripped of
+    surrounding whitespace.
     """
+    # Read the file in one go and split it rather than iterating over the
+    # file object line by line (text mode has already normalised the
+    # newlines, so this splits exactly where iterating would)
     with open(filePath, 'r', encoding='utf-8') as file:
-        lines: List[str] = [
-            line.strip() for line in file if line.strip('\n')
-        ]
-        return lines
+        contents: str = file.read()
+
+    for line in contents.split('\n'):
+        if line:
+            yield line.strip()
 
 def readJsonFile(filePath: str) -> Optional[str]:
     """
@@ -27,10 +32,14 @@ def readJsonFile(filePath: str) -> Optional[str]:
 
 def writeJsonFile(
     filePath: str,
-    data: Any
+    data: Any,
+    default: Optional[Callable[[Any], Any]] = None
 ) -> None:
     """
     Dump the data to a JSON file.
+    Objects JSON cannot serialise are converted with default as they are written.
     """
-    with open(filePath, 'w', encoding='utf-8') as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+    # json.dump streams many small chunks, so give it a large buffer to
+    # coalesce them into few writes
+    with open(filePath, 'w', encoding='utf-8', buffering=1 << 20) as file:
+        json.dump(data, file, ensure_ascii=False, indent=4, default=default)
@@ -1,5 +1,6 @@
-from typing import List
-from matplotlib.pylab import Enum
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, List, Tuple
 
 class Resources:
     """
@@ -57,6 +58,20 @@ class GeneratorConfigDefaults:
     outputOrder: List[OutputOrder] = []
     wordsToBury: List[str] = []
 
+@dataclass(frozen=True)
+class GeneratorConfig:
+    """
+    All of the settings of a generator configuration file.
+    """
+    inputFilePath: str
+    outputFilePath: str
+    clozeChoosingAlgorithm: ClozeChoosingAlgorithm
+    numFlashcardsPerWord: int
+    benefitShorterSentences: bool
+    outputOrder: Tuple[OutputOrder, ...]
+    # A tuple of words, unless the file holds something other than a list
+    wordsToBury: Any
+
 class GeneratorConfigMapping:
     requiredKeys: List[str] = [
         "name",
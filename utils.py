@@ -1,7 +1,7 @@
 import logging
 import sys
 import random
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 import json
 
 from algorithms import (
@@ -26,21 +26,26 @@ from configUtils import (
     getWordsToBury
 )
 from globalUtils import (
+    countInUseClozeFlashcards,
     getInUseClozeFlashcards,
     getUniqueWordIdToWordObjects
 )
 
 logger = logging.getLogger(__name__)
 
+clozeChoosingAlgorithmToFunction: Dict[
+    ClozeChoosingAlgorithm,
+    Callable[[str], Dict[str, List[SimpleClozeFlashcard]]]
+] = {
+    ClozeChoosingAlgorithm.FIRST_SENTENCES_FIRST: firstSentencesFirstAlgorithm,
+    ClozeChoosingAlgorithm.MOST_DIFFERENT: mostDifferentAlgorithm,
+    ClozeChoosingAlgorithm.HIGHEST_PROPORTION_OF_NEW_WORDS: highestProportionOfNewWordsAlgorithm
+}
+
 def printGeneratingClozeFlashcardsInfo(configFilePath: str) -> None:
-    inUseClozeFlashcards: Dict[str, List[ClozeFlashcard]] = (
-        getInUseClozeFlashcards(configFilePath)
-    )
     clozeChoosingAlgorithm: ClozeChoosingAlgorithm = getClozeChoosingAlgorithm(configFilePath)
 
-    totalInUseClozeFlashcards: int = sum(
-        len(flashcards) for flashcards in inUseClozeFlashcards.values()
-    )
+    totalInUseClozeFlashcards: int = countInUseClozeFlashcards(configFilePath)
     logger.info(
         "Generating cloze flashcards using the '%s' algorithm "
         "given %d existing cloze flashcards...",
@@ -56,19 +61,18 @@ def generateClozeFlashcards(configFilePath: str) -> Dict[str, List[SimpleClozeFl
         printGeneratingClozeFlashcardsInfo(configFilePath)
 
     clozeChoosingAlgorithm: ClozeChoosingAlgorithm = getClozeChoosingAlgorithm(configFilePath)
-    if clozeChoosingAlgorithm == ClozeChoosingAlgorithm.FIRST_SENTENCES_FIRST:
-        return firstSentencesFirstAlgorithm(configFilePath)
-    if clozeChoosingAlgorithm == ClozeChoosingAlgorithm.MOST_DIFFERENT:
-        return mostDifferentAlgorithm(configFilePath)
-    if clozeChoosingAlgorithm == ClozeChoosingAlgorithm.HIGHEST_PROPORTION_OF_NEW_WORDS:
-        return highestProportionOfNewWordsAlgorithm(configFilePath)
-
-    # If an unknown algorithm is specified, log an error and return an empty dictionary
-    logger.error(
-        "Unknown cloze choosing algorithm '%s' specified in the config file.",
-        clozeChoosingAlgorithm
-    )
-    return {}
+    algorithm: Optional[
+        Callable[[str], Dict[str, List[SimpleClozeFlashcard]]]
+    ] = clozeChoosingAlgorithmToFunction.get(clozeChoosingAlgorithm)
+    if algorithm is None:
+        # If an unknown algorithm is specified, log an error and return an empty dictionary
+        logger.error(
+            "Unknown cloze choosing algorithm '%s' specified in the config file.",
+            clozeChoosingAlgorithm
+        )
+        return {}
+
+    return algorithm(configFilePath)
 
 def ensureInUseClozeFlashcardsPersist(
     configFilePath: str,
@@ -89,36 +93,30 @@ def ensureInUseClozeFlashcardsPersist(
             )
             sys.exit(1)
 
-        for clozeFlashcard in clozeFlashcards:
-            simpleClozeFlashcard = clozeFlashcard.getSimpleClozeFlashcard()
-            if simpleClozeFlashcard not in wordToSimpleClozeFlashcards[word]:
-                # If the cloze flashcard is not in the new cloze flashcards,
-                # a serious error has occurred
-                logger.error(
-                    "Cloze flashcard '%s' for word '%s' "
-                    "from in-use cloze flashcards is not present in the new "
-                    "cloze flashcards.",
-                    simpleClozeFlashcard, word
-                )
-                sys.exit(1)
-
-def convertToJsonableFormat(
-    wordToSimpleClozeFlashcards: Dict[str, List[SimpleClozeFlashcard]]
-) -> Dict[str, List[Dict[str, str]]]:
-    """
-    Convert the word to SimpleClozeFlashcard dictionary to a JSON-serializable format.
-    Returns a dictionary of words to lists of dictionaries
-    representing SimpleClozeFlashcards.
-    """
-    wordToJsonableClozeFlashcards: Dict[str, List[Dict[str, str]]] = {}
-
-    for word, simpleClozeFlashcards in wordToSimpleClozeFlashcards.items():
-        jsonableFlashcards: List[Dict[str, str]] = []
-        for simpleClozeFlashcard in simpleClozeFlashcards:
-            jsonableFlashcards.append(simpleClozeFlashcard.toJsonableDict())
-        wordToJsonableClozeFlashcards[word] = jsonableFlashcards
-
-    return wordToJsonableClozeFlashcards
+        inUseSimpleClozeFlashcards: List[SimpleClozeFlashcard] = [
+            clozeFlashcard.getSimpleClozeFlashcard()
+            for clozeFlashcard in clozeFlashcards
+        ]
+        missingSimpleClozeFlashcards: Set[SimpleClozeFlashcard] = (
+            set(inUseSimpleClozeFlashcards).difference(
+                wordToSimpleClozeFlashcards[word]
+            )
+        )
+        if missingSimpleClozeFlashcards:
+            # If a cloze flashcard is not in the new cloze flashcards,
+            # a serious error has occurred (report the first one in order)
+            simpleClozeFlashcard: SimpleClozeFlashcard = next(
+                simpleClozeFlashcard
+                for simpleClozeFlashcard in inUseSimpleClozeFlashcards
+                if simpleClozeFlashcard in missingSimpleClozeFlashcards
+            )
+            logger.error(
+                "Cloze flashcard '%s' for word '%s' "
+                "from in-use cloze flashcards is not present in the new "
+                "cloze flashcards.",
+                simpleClozeFlashcard, word
+            )
+            sys.exit(1)
 
 def getOutputFileData(configFilePath: str) -> Dict[str, List[SimpleClozeFlashcard]]:
     """
@@ -153,27 +151,40 @@ def storeWordToSimpleClozeFlashcards(
         wordToSimpleClozeFlashcards
     )
 
-    wordToJsonableClozeFlashcards: Dict[str, List[Dict[str, str]]] = (
-        convertToJsonableFormat(wordToSimpleClozeFlashcards)
-    )
-
+    # Convert each flashcard to its JSON form as it is written rather than
+    # building a JSON-ready copy of the whole dictionary first
     outputFilePath: str = getOutputFilePath(configFilePath)
-    writeJsonFile(outputFilePath, wordToJsonableClozeFlashcards)
+    writeJsonFile(
+        outputFilePath,
+        wordToSimpleClozeFlashcards,
+        default=SimpleClozeFlashcard.toJsonableDict
+    )
 
 def sortSimpleClozeFlashcards(
     wordToSimpleClozeFlashcards: Dict[str, List[SimpleClozeFlashcard]],
     configFilePath: str
 ) -> Dict[str, List[SimpleClozeFlashcard]]:
+    """
+    Sort the words by the output orders in the config, earlier orders
+    taking priority and later ones breaking their ties.
+    Sorts once by a key made of every order's value for the word.
+    """
     outputOrder: List[OutputOrder] = getOutputOrder(configFilePath)
-    outputOrder.reverse()
+    items: List[Tuple[str, List[SimpleClozeFlashcard]]] = list(
+        wordToSimpleClozeFlashcards.items()
+    )
+
+    # A random order shuffles away any order after it, so only the orders
+    # before it are left to sort by once the words have been shuffled
+    if OutputOrder.RANDOM in outputOrder:
+        outputOrder = outputOrder[:outputOrder.index(OutputOrder.RANDOM)]
+        random.shuffle(items)
+
+    keyParts: List[Callable[[str], Any]] = []
     for order in outputOrder:
         if order == OutputOrder.ALPHABETICAL:
-            wordToSimpleClozeFlashcards = dict(
-                sorted(
-                    wordToSimpleClozeFlashcards.items(),
-                    key=lambda item: item[0] # Sort by word (key)
-                )
-            )
+            # Sort by word (key)
+            keyParts.append(lambda word: word)
         elif order == OutputOrder.FREQUENCY:
             uniqueWordIdToWordObjects: Dict[str, List[Word]] = (
                 getUniqueWordIdToWordObjects(configFilePath)
@@ -181,30 +192,13 @@ def sortSimpleClozeFlashcards(
             frequencies: Dict[str, int] = {}
             for word, references in uniqueWordIdToWordObjects.items():
                 frequencies[word] = len(references)
-            wordToSimpleClozeFlashcards = dict(
-                sorted(
-                    wordToSimpleClozeFlashcards.items(),
-                    # Sort by frequency
-                    key=lambda item: frequencies[item[0]],
-                    # Most frequent first
-                    reverse=True
-                )
-            )
-        elif order == OutputOrder.RANDOM:
-            items = list(wordToSimpleClozeFlashcards.items())
-            random.shuffle(items)
-            wordToSimpleClozeFlashcards = dict(items)
+            # Most frequent first
+            keyParts.append(lambda word, frequencies=frequencies: -frequencies[word])
         elif order == OutputOrder.LEAST_USED_AS_CLOZE_FIRST:
             usedCounts: Dict[str, int] = {}
             for word, flashcards in wordToSimpleClozeFlashcards.items():
                 usedCounts[word] = sum(1 for fc in flashcards if fc.inUse)
-            wordToSimpleClozeFlashcards = dict(
-                sorted(
-                    wordToSimpleClozeFlashcards.items(),
-                    # Sort by used count
-                    key=lambda item: usedCounts[item[0]],
-                )
-            )
+            keyParts.append(lambda word, usedCounts=usedCounts: usedCounts[word])
         elif order == OutputOrder.LEAST_IN_USED_SENTENCES_FIRST:
             inUseCounts: Dict[str, int] = {}
             for word in wordToSimpleClozeFlashcards.keys():
@@ -221,15 +215,12 @@ def sortSimpleClozeFlashcards(
                     if uniqueWordId not in inUseCounts:
                         inUseCounts[uniqueWordId] = 0
                     inUseCounts[uniqueWordId] += 1
-            wordToSimpleClozeFlashcards = dict(
-                sorted(
-                    wordToSimpleClozeFlashcards.items(),
-                    # Sort by in use count
-                    key=lambda item: inUseCounts[item[0]],
-                )
-            )
+            keyParts.append(lambda word, inUseCounts=inUseCounts: inUseCounts[word])
 
-    return wordToSimpleClozeFlashcards
+    if keyParts:
+        items.sort(key=lambda item: tuple(keyPart(item[0]) for keyPart in keyParts))
+
+    return dict(items)
 
 def burySimpleClozeFlashcards(
     wordToSimpleClozeFlashcards: Dict[str, List[SimpleClozeFlashcard]],
@@ -239,13 +230,17 @@ def burySimpleClozeFlashcards(
     Bury specified words in the SimpleClozeFlashcards.
     Returns a dictionary of words to lists of SimpleClozeFlashcard objects.
     """
-    wordsToBury: List[str] = getWordsToBury(configFilePath)
-    wordToSimpleClozeFlashcards = dict(
-        sorted(
-            wordToSimpleClozeFlashcards.items(),
-            # Bury specified words
-            key=lambda item: 1 if item[0] in wordsToBury else 0
-        )
-    )
+    wordsToBury: Set[str] = set(getWordsToBury(configFilePath))
 
-    return wordToSimpleClozeFlashcards
+    # Move the buried words to the end, keeping both groups in their
+    # current order (what a stable sort on "is buried" would give)
+    buriedWordToSimpleClozeFlashcards: Dict[str, List[SimpleClozeFlashcard]] = {}
+    unburiedWordToSimpleClozeFlashcards: Dict[str, List[SimpleClozeFlashcard]] = {}
+    for word, simpleClozeFlashcards in wordToSimpleClozeFlashcards.items():
+        if word in wordsToBury:
+            buriedWordToSimpleClozeFlashcards[word] = simpleClozeFlashcards
+        else:
+            unburiedWordToSimpleClozeFlashcards[word] = simpleClozeFlashcards
+
+    unburiedWordToSimpleClozeFlashcards.update(buriedWordToSimpleClozeFlashcards)
+    return unburiedWordToSimpleClozeFlashcards